@@ -6,15 +6,36 @@ import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import io
+import logging
+import sys
+import re
 import json
+import tempfile
+import threading
+import weakref
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from psycopg2.pool import ThreadedConnectionPool
 try:
     # Deployment/runtime often imports this file as top-level `main.py`, with
     # `api/` as the working directory on sys.path.
-    from parsers.dispatcher import extract_records_from_bytes_for_faculdade
+    from parsers.dispatcher import (
+        extract_columns_from_file_for_faculdade,
+        extract_columns_from_path_for_faculdade,
+    )
 except ModuleNotFoundError:
     # Local development may import as a package: `import api.main`.
-    from api.parsers.dispatcher import extract_records_from_bytes_for_faculdade
+    from api.parsers.dispatcher import (
+        extract_columns_from_file_for_faculdade,
+        extract_columns_from_path_for_faculdade,
+    )
 
 app = FastAPI(title="SiSU PDF Parser API")
 
@@ -29,6 +50,8 @@ app.add_middleware(
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 SUPABASE_STORAGE_BASE_URL = os.environ.get("SUPABASE_STORAGE_BASE_URL")
+# Prefix for relative storage keys, with exactly one trailing slash.
+_STORAGE_BASE = SUPABASE_STORAGE_BASE_URL.rstrip('/') + '/' if SUPABASE_STORAGE_BASE_URL else None
 
 processo_faculdade_map = {
     "ufscar": "UFSCar",
@@ -39,19 +62,251 @@ processo_faculdade_map = {
     "ifsp": "IFSP",
 }
 
+# Downloads are streamed into a spooled temp file: PDFs up to this size stay
+# in memory, larger ones roll over to disk instead of growing the worker RSS.
+_PDF_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+_DOWNLOAD_CHUNK_BYTES = 64 * 1024
+# When storage honours Range requests, PDFs larger than one segment are
+# fetched as several byte ranges in parallel instead of one long stream.
+_RANGE_SEGMENT_BYTES = 4 * 1024 * 1024
+_RANGE_WORKERS = 4
+_DOWNLOAD_TIMEOUT = (10, 60)  # (connect timeout, read timeout)
+
+# Jobs are dominated by the PDF download and DB round-trips, so a few of them
+# run side by side on their own executor: asyncio's default one is sized from
+# the CPU count, which would silently cap I/O-bound jobs on small containers.
+_JOB_CONCURRENCY = max(1, int(os.environ.get("JOB_WORKERS", 8)))
+_JOB_EXECUTOR = ThreadPoolExecutor(max_workers=_JOB_CONCURRENCY, thread_name_prefix="job")
+
+# Shared HTTP session so PDF downloads reuse keep-alive connections instead
+# of doing a new TLS handshake per file. Transient gateway errors are retried.
+SESSION = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    # Every job may have _RANGE_WORKERS segment requests in flight at once.
+    pool_maxsize=_JOB_CONCURRENCY * _RANGE_WORKERS,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        # Hand the last response back so raise_for_status() still reports it.
+        raise_on_status=False,
+    ),
+)
+SESSION.mount("https://", _HTTP_ADAPTER)
+SESSION.mount("http://", _HTTP_ADAPTER)
+
+
+def _range_total(response) -> int | None:
+    """Total object size from a 206 response's Content-Range, if any."""
+    if response.status_code != 206:
+        return None
+    content_range = response.headers.get("content-range", "")
+    total = content_range.rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def _range_validator(response) -> str | None:
+    """ETag/Last-Modified to send as If-Range, so every segment comes from the
+    same version of the object. Weak ETags can't be used with If-Range."""
+    etag = response.headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("last-modified")
+
+
+def _fetch_range(url: str, start: int, end: int, validator: str) -> bytes:
+    headers = {"Range": f"bytes={start}-{end}", "If-Range": validator}
+    with SESSION.get(url, headers=headers, timeout=_DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            # A 200 to an If-Range request means the object changed since the
+            # first segment (or Range support went away): the parts would not
+            # belong to the same file.
+            raise RuntimeError(f"Range request not honoured for {url} (status {response.status_code}); object changed mid-download?")
+        return response.content
+
+
+def _stream_into(pdf_file, url: str, headers: dict | None = None):
+    """GET `url` and stream its body into `pdf_file`; returns the response."""
+    with SESSION.get(url, headers=headers, stream=True, timeout=_DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_BYTES):
+            pdf_file.write(chunk)
+    return response
+
+
+def _download_pdf(url: str, named: bool = False):
+    """Stream `url` into a spooled temp file.
+
+    With `named`, the PDF goes to a named temp file on disk instead, so its
+    path (`file.name`) can be handed to another process.
+
+    Returns (file, size, response); the file is rewound and owned by the caller.
+    `size` is the full spooled size; `response` is the first request's, which
+    for a ranged download only covers its first segment.
+    """
+    if named:
+        pdf_file = tempfile.NamedTemporaryFile(suffix=".pdf")
+    else:
+        pdf_file = tempfile.SpooledTemporaryFile(max_size=_PDF_SPOOL_MAX_BYTES)
+    try:
+        # Avoid hanging network calls in serverless runtimes.
+        # Asking for the first segment only costs nothing on servers without
+        # Range support: they answer 200 with the whole body.
+        first = {"Range": f"bytes=0-{_RANGE_SEGMENT_BYTES - 1}"}
+        response = _stream_into(pdf_file, url, first)
+        total = _range_total(response)
+        validator = _range_validator(response)
+        if response.status_code == 206 and (total is None or (total > pdf_file.tell() and not validator)):
+            # A partial body we can't safely complete: the total size is
+            # unknown ("bytes 0-N/*"), or there is no validator to keep the
+            # segments on one version. Start over with a plain full GET.
+            pdf_file.seek(0)
+            pdf_file.truncate()
+            response = _stream_into(pdf_file, url)
+        elif total is not None and total > pdf_file.tell():
+            starts = iter(range(pdf_file.tell(), total, _RANGE_SEGMENT_BYTES))
+            with ThreadPoolExecutor(max_workers=_RANGE_WORKERS) as executor:
+                # At most _RANGE_WORKERS segments are in flight (and held in
+                # memory) at once; they are appended in order as the oldest
+                # one completes, so the spool bound still holds.
+                def submit(start):
+                    end = min(start + _RANGE_SEGMENT_BYTES, total) - 1
+                    return executor.submit(_fetch_range, url, start, end, validator)
+
+                pending = deque(submit(start) for start in islice(starts, _RANGE_WORKERS))
+                while pending:
+                    pdf_file.write(pending.popleft().result())
+                    start = next(starts, None)
+                    if start is not None:
+                        pending.append(submit(start))
+    except BaseException:
+        pdf_file.close()
+        raise
+    size = pdf_file.tell()
+    # Named files are read back by path from another process.
+    pdf_file.flush()
+    pdf_file.seek(0)
+    return pdf_file, size, response
+
+# PDF parsing is CPU-bound, so with several jobs in flight it runs in worker
+# processes instead of contending for the GIL. PARSE_WORKERS=0 (or a runtime
+# without multiprocessing support) keeps parsing inline in the job thread.
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 1))
+PARSE_POOL: ProcessPoolExecutor | None = None
+
+# Process-wide pool: a fresh connect costs TCP + TLS + auth round-trips.
+# Created on first use so importing this module never touches the network.
+# Every job thread holds a connection for its whole run; the extra two keep
+# the batch claim and the status flush from queueing behind them.
+_POOL_MAXCONN = _JOB_CONCURRENCY + 2
+_POOL: ThreadedConnectionPool | None = None
+_POOL_LOCK = threading.Lock()
+# ThreadedConnectionPool raises PoolError instead of waiting when it runs dry
+# (e.g. overlapping /process-jobs triggers each claiming and flushing), so
+# leases wait for a free slot here first.
+_POOL_SLOTS = threading.BoundedSemaphore(_POOL_MAXCONN)
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    global _POOL
+    if _POOL is None:
+        if not DATABASE_URL:
+            raise Exception("DATABASE_URL environment variable not set")
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=_POOL_MAXCONN,
+                    dsn=DATABASE_URL,
+                    cursor_factory=RealDictCursor,
+                )
+    return _POOL
+
+
+@contextmanager
 def get_db_connection():
-    if not DATABASE_URL:
-        raise Exception("DATABASE_URL environment variable not set")
-    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+    """Lease a pooled connection, waiting for one if all are in use.
+
+    The connection goes back to the pool on exit.
+    """
+    pool = _get_pool()
+    with _POOL_SLOTS:
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            # The pool rolls back anything left open; broken connections are
+            # discarded instead of being handed out again.
+            pool.putconn(conn, close=bool(conn.closed))
+
+
+# Job logs get their own handler so the [job:<id>] prefix doesn't depend on
+# how uvicorn (or the worker) configured the root logger.
+_logger = logging.getLogger("pipeline")
+if not _logger.handlers:
+    _log_handler = logging.StreamHandler(sys.stdout)
+    _log_handler.setFormatter(logging.Formatter("[%(asctime)s][job:%(job_id)s] %(message)s"))
+    _logger.addHandler(_log_handler)
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
 
 
-def _now_ms() -> int:
-    return int(time.time() * 1000)
+def _log(job_id: str, msg: str, *args) -> None:
+    # Keep logs single-line for Vercel readability. `msg` is a %-style format
+    # string, only rendered when INFO is enabled.
+    _logger.info(msg, *args, extra={"job_id": job_id})
 
 
-def _log(job_id: str, msg: str) -> None:
-    # Keep logs single-line for Vercel readability.
-    print(f"[{_now_ms()}][job:{job_id}] {msg}")
+# Parsers return (nomes, cursos, tipos, periodos): the same order as the
+# last four columns here.
+_LEADS_RAW_COLUMNS = '"Faculdade", "Ano", "Nome", "Curso", "Tipo", "Periodo"'
+
+# COPY text format treats backslash, tab and newlines as special characters.
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_COPY_SPECIAL_RE = re.compile(r"[\\\t\n\r]")
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    value = str(value)
+    # Names almost never need escaping; one scan is much cheaper than translate().
+    if _COPY_SPECIAL_RE.search(value) is None:
+        return value
+    return value.translate(_COPY_ESCAPES)
+
+
+def _copy_buffer(rows) -> io.BytesIO:
+    """Serialize rows into an in-memory buffer for `COPY ... FROM STDIN`.
+
+    The batch is encoded to UTF-8 once, so psycopg2 streams the bytes as-is
+    instead of re-encoding every chunk it reads.
+    """
+    lines = ["\t".join([_copy_value(v) for v in row]) + "\n" for row in rows]
+    return io.BytesIO("".join(lines).encode("utf-8"))
+
+
+# course_responsavel is small and rarely edited: keep a snapshot in memory
+# and refresh it every few minutes instead of joining the table on every job.
+_COURSE_RESPONSAVEL_TTL_S = 300
+_course_responsavel_cache: tuple[float, tuple[list, list]] | None = None
+
+
+def _course_responsavel_arrays(cur) -> tuple[list, list]:
+    """Return (cursos, responsaveis) as parallel lists for `unnest`."""
+    global _course_responsavel_cache
+    now = time.monotonic()
+    cached = _course_responsavel_cache
+    if cached is not None and now - cached[0] < _COURSE_RESPONSAVEL_TTL_S:
+        return cached[1]
+
+    cur.execute("SELECT curso, responsavel_nome FROM public.course_responsavel")
+    rows = cur.fetchall()
+    arrays = ([r["curso"] for r in rows], [r["responsavel_nome"] for r in rows])
+    _course_responsavel_cache = (now, arrays)
+    return arrays
 
 
 class _StepTimer:
@@ -60,268 +315,618 @@ class _StepTimer:
         self.step = step
         self._t0 = time.perf_counter()
 
-    def done(self, extra: str = "") -> None:
+    def done(self, fmt: str = "", *args) -> None:
+        """Log the step's duration; `fmt`/`args` add %-style details, which
+        like `_log` are only rendered when INFO is enabled."""
+        if not _logger.isEnabledFor(logging.INFO):
+            return
         dt_ms = (time.perf_counter() - self._t0) * 1000
-        suffix = f" | {extra}" if extra else ""
-        _log(self.job_id, f"{self.step} done in {dt_ms:.1f}ms{suffix}")
+        if fmt:
+            _log(self.job_id, "%s done in %.1fms | " + fmt, self.step, dt_ms, *args)
+        else:
+            _log(self.job_id, "%s done in %.1fms", self.step, dt_ms)
+
+# Per-connection session state. The temp tables live as long as the pooled
+# connection (ON COMMIT DELETE ROWS just empties them) so the statements below
+# can be PREPAREd once per connection and keep their plans, instead of being
+# parsed and planned again on every job.
+# leads_raw_stage holds only the COPYed columns (_LEADS_RAW_COLUMNS): a LIKE
+# copy of leads_raw would drag in its other NOT NULL columns and evaluate the
+# id default for every staged row. "Ano" is staged as the integer the job
+# parses it to; it assigns to leads_raw."Ano" whether that is integer or text.
+# Note: needs session-level connection pinning; it won't work behind a
+# transaction-mode pgbouncer.
+_SESSION_SETUP_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS leads_raw_stage (
+      "Faculdade" text,
+      "Ano" integer,
+      "Nome" text,
+      "Curso" text,
+      "Tipo" text,
+      "Periodo" text
+    ) ON COMMIT DELETE ROWS;
+    CREATE TEMP TABLE IF NOT EXISTS inserted_names (nome text PRIMARY KEY)
+      ON COMMIT DELETE ROWS;
+"""
+
+# 4a. Move the staged batch into leads_raw. ON CONFLICT still applies, and
+# the names actually inserted are kept in `inserted_names` so steps 4b-4d
+# only touch this job's leads instead of rescanning every table. Faculdade
+# and Ano are the same for the whole batch, so inserted rows have distinct
+# names and counting `inserted_names` gives the number of new rows.
+_INSERT_LEADS_RAW_SQL = f"""
+    WITH ins AS (
+      INSERT INTO public.leads_raw ({_LEADS_RAW_COLUMNS})
+      SELECT {_LEADS_RAW_COLUMNS} FROM leads_raw_stage
+      ON CONFLICT ("Faculdade", "Ano", "Nome") DO NOTHING
+      RETURNING "Nome"
+    )
+    INSERT INTO inserted_names (nome)
+    SELECT DISTINCT "Nome" FROM ins
+"""
+
+# 4b. Merge raw -> silver (keep the latest created_at per "Nome")
+# Note: This relies on Postgres MERGE (PG15+) support.
+# The latest row of each name is the first entry of leads_raw_nome_created_idx
+# for it, so the LATERAL ... LIMIT 1 reads one index entry per name instead of
+# sorting every raw row of this job's names (as DISTINCT ON ... ORDER BY did).
+_MERGE_SILVER_SQL = """
+    MERGE INTO public.leads_silver AS tgt
+    USING (
+      SELECT
+        r."Nome",
+        r."Ano",
+        r."Faculdade",
+        r."Curso",
+        r."Tipo",
+        r."Periodo",
+        r.created_at
+      FROM inserted_names i
+      CROSS JOIN LATERAL (
+        SELECT *
+        FROM public.leads_raw
+        WHERE "Nome" = i.nome
+        ORDER BY created_at DESC
+        LIMIT 1
+      ) r
+    ) AS src
+    ON (tgt."Nome" = src."Nome")
+    WHEN MATCHED AND src.created_at > tgt.created_at THEN
+      UPDATE SET
+        "Ano" = src."Ano",
+        "Faculdade" = src."Faculdade",
+        "Curso" = src."Curso",
+        "Tipo" = src."Tipo",
+        "Periodo" = src."Periodo",
+        created_at = src.created_at,
+        updated_at = now()
+    WHEN NOT MATCHED THEN
+      INSERT (
+        "Nome",
+        "Ano",
+        "Faculdade",
+        "Curso",
+        "Tipo",
+        "Periodo",
+        created_at,
+        updated_at
+      )
+      VALUES (
+        src."Nome",
+        src."Ano",
+        src."Faculdade",
+        src."Curso",
+        src."Tipo",
+        src."Periodo",
+        src.created_at,
+        now()
+      )
+"""
+
+# 4c. Upsert silver -> dimension_lead (seed CRM dimension)
+# ON CONFLICT (nome) needs dimension_lead_nome_uq, created once by
+# scripts/init_indexes.sql rather than on every job.
+# $1/$2: the cached course_responsavel snapshot as (cursos, responsaveis).
+_UPSERT_DIMENSION_SQL = """
+    INSERT INTO public.dimension_lead (
+      nome,
+      responsavel_nome,
+      "Ano",
+      "Faculdade",
+      "Curso",
+      "Tipo",
+      "Periodo",
+      source_silver_created_at,
+      updated_at
+    )
+    SELECT
+      s."Nome" as nome,
+      cr.responsavel_nome,
+      s."Ano",
+      s."Faculdade",
+      s."Curso",
+      s."Tipo",
+      s."Periodo",
+      s.created_at as source_silver_created_at,
+      now() as updated_at
+    FROM public.leads_silver s
+    JOIN inserted_names i ON i.nome = s."Nome"
+    LEFT JOIN unnest($1::text[], $2::text[]) AS cr(curso, responsavel_nome)
+      ON cr.curso = s."Curso"
+    ON CONFLICT (nome) DO UPDATE
+    SET
+      responsavel_nome = COALESCE(public.dimension_lead.responsavel_nome, EXCLUDED.responsavel_nome),
+      "Ano" = EXCLUDED."Ano",
+      "Faculdade" = EXCLUDED."Faculdade",
+      "Curso" = EXCLUDED."Curso",
+      "Tipo" = EXCLUDED."Tipo",
+      "Periodo" = EXCLUDED."Periodo",
+      source_silver_created_at = EXCLUDED.source_silver_created_at,
+      updated_at = now()
+    WHERE
+      public.dimension_lead.source_silver_created_at IS NULL
+      OR EXCLUDED.source_silver_created_at > public.dimension_lead.source_silver_created_at
+    RETURNING lead_id
+"""
+
+# 4d. Seed initial CRM status for this job's leads that don't have any
+# events yet, straight from the lead_ids the 4c upsert returned.
+# Important: do NOT overwrite existing CRM history.
+_UPSERT_DIMENSION_SEED_CRM_SQL = f"""
+    WITH d AS ({_UPSERT_DIMENSION_SQL})
+    INSERT INTO public.fact_crm (lead_id, status, observacoes, changed_by)
+    SELECT d.lead_id, 'Novo'::text AS status, NULL::text AS observacoes, 'pipeline'::text AS changed_by
+    FROM d
+    WHERE NOT EXISTS (
+        SELECT 1 FROM public.fact_crm f WHERE f.lead_id = d.lead_id
+    )
+"""
+
+_PREPARED_STATEMENTS = (
+    ("insert_leads_raw", "", _INSERT_LEADS_RAW_SQL),
+    ("merge_silver", "", _MERGE_SILVER_SQL),
+    ("upsert_dimension_seed_crm", "(text[], text[])", _UPSERT_DIMENSION_SEED_CRM_SQL),
+)
+
+# Connections whose session has already been set up.
+_PREPARED_CONNECTIONS = weakref.WeakSet()
+
+
+def _prepare_session(conn) -> None:
+    """Create the temp tables and PREPARE the hot statements once per connection."""
+    if conn in _PREPARED_CONNECTIONS:
+        return
+    try:
+        # _copy_buffer hands COPY pre-encoded UTF-8 bytes.
+        conn.set_client_encoding("UTF8")
+        with conn.cursor() as cur:
+            cur.execute(_SESSION_SETUP_SQL)
+            for name, arg_types, sql in _PREPARED_STATEMENTS:
+                cur.execute(f"PREPARE {name} {arg_types} AS {sql}")
+        conn.commit()
+    except Exception:
+        # PREPARE isn't transactional: the rollback drops the temp tables but
+        # keeps the statements prepared before the failure, so the next job
+        # on this connection would trip over "already exists" instead of the
+        # real error. Deallocate them, or drop the connection if even that
+        # fails (get_db_connection discards closed connections).
+        try:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute("DEALLOCATE ALL")
+            conn.commit()
+        except psycopg2.Error:
+            conn.close()
+        raise
+    _PREPARED_CONNECTIONS.add(conn)
+
 
 def process_job(job):
     job_id = job['id']
+    job_id_str = str(job_id)
     storage_key = job['storage_key']
 
     # Handle storage key to full URL using Supabase Storage
     if not storage_key.startswith("http"):
-        if SUPABASE_STORAGE_BASE_URL:
-            # Ensure no double slashes if both end/start with /
-            base = SUPABASE_STORAGE_BASE_URL.rstrip('/')
-            path = storage_key.lstrip('/')
-            storage_key = f"{base}/{path}"
+        if _STORAGE_BASE:
+            storage_key = _STORAGE_BASE + storage_key.lstrip('/')
         else:
-            print(f"Warning: Job {job_id} has relative storage_key '{storage_key}' but SUPABASE_STORAGE_BASE_URL is not set.")
+            _log(job_id_str, "Warning: relative storage_key %r but SUPABASE_STORAGE_BASE_URL is not set", storage_key)
 
     faculdade = job['Faculdade']
     ano = job['Ano']
 
-    _log(str(job_id), f"Processing job for faculdade={faculdade!r} ano={ano!r} url={storage_key}")
+    _log(job_id_str, "Processing job for faculdade=%r ano=%r url=%s", faculdade, ano, storage_key)
 
+    # One connection for the whole job: every step used to open its own,
+    # paying connect + TLS + auth each time.
     try:
-        # 1. Update status to parsing
-        t = _StepTimer(str(job_id), "db:update_status_parsing")
         with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute("UPDATE imports SET status = 'parsing', updated_at = NOW() WHERE id = %s", (job_id,))
-                conn.commit()
-        t.done()
+            return _process_job_on_connection(conn, job_id, storage_key, faculdade, ano)
+    except Exception as e:
+        _log(job_id_str, "Job failed: %s: %s", type(e).__name__, e)
+        return _job_status(job_id, "failed", error=str(e))
+
+
+def _job_status(job_id, status: str, stats: dict | None = None, error: str | None = None) -> dict:
+    """Final `imports` row values for a job; written by `_flush_job_statuses`."""
+    return {"id": job_id, "status": status, "stats_json": stats, "error": error}
+
+
+def _process_job_on_connection(conn, job_id, storage_key, faculdade, ano) -> dict:
+    job_id_str = str(job_id)
+    try:
+        _prepare_session(conn)
+        cur = conn.cursor()
+
+        # 1. Status is already 'parsing': the job was claimed by
+        # _claim_pending_jobs.
 
         # 2. Download PDF
-        t = _StepTimer(str(job_id), "http:download_pdf")
-        # Avoid hanging network calls in serverless runtimes.
-        # (connect timeout, read timeout)
-        response = requests.get(storage_key, timeout=(10, 60))
-        response.raise_for_status()
-        pdf_bytes = response.content
-        size = len(pdf_bytes)
-        cl = response.headers.get("content-length")
+        t = _StepTimer(job_id_str, "http:download_pdf")
+        # The parse pool gets the PDF's path rather than its bytes, so the file
+        # is never read into this process nor pickled over to the worker.
+        pdf_file, size, response = _download_pdf(storage_key, named=PARSE_POOL is not None)
+        # `response` may be just the first of several Range segments, so
+        # only the spooled size describes the whole file.
         ct = response.headers.get("content-type")
-        t.done(extra=f"status={response.status_code} bytes={size} content_length={cl} content_type={ct}")
+        t.done("bytes=%d content_type=%s", size, ct)
 
         # 3. Parse PDF (select parser by faculdade)
-        t = _StepTimer(str(job_id), "parse:extract_records")
-        records = extract_records_from_bytes_for_faculdade(pdf_bytes, faculdade)
-        t.done(extra=f"records={len(records)}")
+        t = _StepTimer(job_id_str, "parse:extract_records")
+        # Records come back as parallel column lists, which are also much
+        # cheaper to pickle back from the parse pool than one dict per row.
+        with pdf_file:
+            if PARSE_POOL is not None:
+                columns = PARSE_POOL.submit(
+                    extract_columns_from_path_for_faculdade, pdf_file.name, faculdade
+                ).result()
+            else:
+                columns = extract_columns_from_file_for_faculdade(pdf_file, faculdade)
+        record_count = len(columns[0])
+        t.done("records=%d", record_count)
+
+        # Steps 4-5 run in a single transaction, committed once at the end.
 
         # 4. Insert directly into Database (leads_raw)
-        inserted_count = 0
-        skipped_count = 0
-
-        t = _StepTimer(str(job_id), "db:insert_leads_raw")
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                insert_query = """
-                    INSERT INTO public.leads_raw (
-                        "Faculdade", "Ano", "Nome", "Curso", "Tipo", "Periodo"
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT ("Faculdade", "Ano", "Nome") DO NOTHING
-                """
+        # COPY the batch into a temp staging table; step 4a then moves it over
+        # with a single INSERT ... SELECT so ON CONFLICT still applies.
+        t = _StepTimer(job_id_str, "db:copy_leads_raw_stage")
+        # Rows are generated straight into the COPY buffer; no intermediate
+        # list of tuples is built for the batch. Faculdade/Ano are the same
+        # for the whole job, so they are resolved once.
+        fac_out = processo_faculdade_map.get(faculdade.lower(), faculdade)
+        ano_int = int(ano)
+        batch_rows = ((fac_out, ano_int, *row) for row in zip(*columns))
+
+        if record_count:
+            cur.copy_expert(
+                f"COPY leads_raw_stage ({_LEADS_RAW_COLUMNS}) FROM STDIN WITH (FORMAT text)",
+                _copy_buffer(batch_rows),
+            )
+        t.done("batch=%d", record_count)
+
+        # 4a-4d run as prepared statements; see _INSERT_LEADS_RAW_SQL & co
+        # above. MERGE can't be used inside a CTE, so they are separate
+        # statements, but all of them are sent together in a single
+        # round-trip; only the trailing count comes back.
+        # 4a. Move the staged rows into leads_raw
+        # 4b. Merge raw -> silver
+        # 4c. Upsert silver -> dimension_lead
+        # 4d. Seed initial CRM status for this job's new leads
+        cursos, responsaveis = _course_responsavel_arrays(cur)
+        t = _StepTimer(job_id_str, "db:insert_merge_upsert_seed")
+        cur.execute(
+            "EXECUTE insert_leads_raw; EXECUTE merge_silver;"
+            " EXECUTE upsert_dimension_seed_crm (%s, %s);"
+            " SELECT count(*) AS inserted FROM inserted_names",
+            (cursos, responsaveis),
+        )
+        inserted_count = cur.fetchone()["inserted"]
+        skipped_count = record_count - inserted_count
+        t.done("inserted=%d skipped=%d", inserted_count, skipped_count)
+
+        _log(job_id_str, "Processed records=%d faculdade=%r ano=%r", record_count, faculdade, ano)
+
+        stats = {
+            "extracted": record_count,
+            "inserted": inserted_count,
+            "skipped": skipped_count,
+            "failed": 0
+        }
 
-                batch_data = [
-                    (
-                        processo_faculdade_map.get(faculdade.lower(), faculdade),
-                        int(ano),
-                        r['nome'],
-                        r['curso'],
-                        r['tipo'],
-                        r['periodo']
-                    )
-                    for r in records
-                ]
-
-                if batch_data:
-                    from psycopg2.extras import execute_batch
-                    execute_batch(cur, insert_query, batch_data)
-                    conn.commit()
-                    inserted_count = len(batch_data)
-        t.done(extra=f"batch={inserted_count}")
-
-        # 4b. Merge raw -> silver (keep the latest created_at per "Nome")
-        # Note: This relies on Postgres MERGE (PG15+) support.
-        t = _StepTimer(str(job_id), "db:merge_raw_to_silver")
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    MERGE INTO public.leads_silver AS tgt
-                    USING (
-                      SELECT DISTINCT ON ("Nome")
-                        "Nome",
-                        "Ano",
-                        "Faculdade",
-                        "Curso",
-                        "Tipo",
-                        "Periodo",
-                        created_at
-                      FROM public.leads_raw
-                      ORDER BY "Nome", created_at DESC
-                    ) AS src
-                    ON (tgt."Nome" = src."Nome")
-                    WHEN MATCHED AND src.created_at > tgt.created_at THEN
-                      UPDATE SET
-                        "Ano" = src."Ano",
-                        "Faculdade" = src."Faculdade",
-                        "Curso" = src."Curso",
-                        "Tipo" = src."Tipo",
-                        "Periodo" = src."Periodo",
-                        created_at = src.created_at,
-                        updated_at = now()
-                    WHEN NOT MATCHED THEN
-                      INSERT (
-                        "Nome",
-                        "Ano",
-                        "Faculdade",
-                        "Curso",
-                        "Tipo",
-                        "Periodo",
-                        created_at,
-                        updated_at
-                      )
-                      VALUES (
-                        src."Nome",
-                        src."Ano",
-                        src."Faculdade",
-                        src."Curso",
-                        src."Tipo",
-                        src."Periodo",
-                        src.created_at,
-                        now()
-                      );
-                    """
-                )
-                conn.commit()
+        # 5. Commit the whole ingest at once. The 'completed' status is
+        # written together with the rest of the batch by _flush_job_statuses.
+        t = _StepTimer(job_id_str, "db:commit")
+        conn.commit()
         t.done()
 
-        # 4c. Upsert silver -> dimension_lead (seed CRM dimension)
-        t = _StepTimer(str(job_id), "db:upsert_silver_to_dimension")
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    CREATE UNIQUE INDEX IF NOT EXISTS dimension_lead_nome_uq
-                      ON public.dimension_lead (nome);
-
-                    INSERT INTO public.dimension_lead (
-                      nome,
-                                            responsavel_nome,
-                      "Ano",
-                      "Faculdade",
-                      "Curso",
-                      "Tipo",
-                      "Periodo",
-                      source_silver_created_at,
-                      updated_at
-                    )
-                    SELECT
-                      s."Nome" as nome,
-                                            cr.responsavel_nome,
-                      s."Ano",
-                      s."Faculdade",
-                      s."Curso",
-                      s."Tipo",
-                      s."Periodo",
-                      s.created_at as source_silver_created_at,
-                      now() as updated_at
-                    FROM public.leads_silver s
-                                        LEFT JOIN public.course_responsavel cr
-                                            ON cr.curso = s."Curso"
-                    ON CONFLICT (nome) DO UPDATE
-                    SET
-                                            responsavel_nome = COALESCE(public.dimension_lead.responsavel_nome, EXCLUDED.responsavel_nome),
-                      "Ano" = EXCLUDED."Ano",
-                      "Faculdade" = EXCLUDED."Faculdade",
-                      "Curso" = EXCLUDED."Curso",
-                      "Tipo" = EXCLUDED."Tipo",
-                      "Periodo" = EXCLUDED."Periodo",
-                      source_silver_created_at = EXCLUDED.source_silver_created_at,
-                      updated_at = now()
-                    WHERE
-                      public.dimension_lead.source_silver_created_at IS NULL
-                      OR EXCLUDED.source_silver_created_at > public.dimension_lead.source_silver_created_at;
-                    """
-                )
-                conn.commit()
-                t.done()
+        _log(job_id_str, "Job completed successfully")
+        return _job_status(job_id, "completed", stats=stats)
 
-        # 4d. Seed initial CRM status for leads that don't have any events yet
-        # Important: do NOT overwrite existing CRM history.
-                t = _StepTimer(str(job_id), "db:seed_fact_crm")
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO public.fact_crm (lead_id, status, observacoes, changed_by)
-                    SELECT d.lead_id, 'Novo'::text AS status, NULL::text AS observacoes, 'pipeline'::text AS changed_by
-                    FROM public.dimension_lead d
-                    WHERE NOT EXISTS (
-                        SELECT 1 FROM public.fact_crm f WHERE f.lead_id = d.lead_id
-                    );
-                    """
-                )
-                conn.commit()
-        t.done()
+    except Exception as e:
+        _log(job_id_str, "Job failed: %s: %s", type(e).__name__, e)
+        try:
+            conn.rollback()
+        except Exception as db_e:
+            _log(job_id_str, "Rollback failed: %s: %s", type(db_e).__name__, db_e)
+        return _job_status(job_id, "failed", error=str(e))
 
-        _log(str(job_id), f"Processed records={len(records)} faculdade={faculdade!r} ano={ano!r}")
 
-        stats = json.dumps({
-            "extracted": len(records),
-            "inserted": inserted_count, # Approx (includes skipped in this simple implementation)
-            "skipped": 0, # Cannot track easily with batch insert + do nothing
-            "failed": 0
-        })
+def _flush_job_statuses(statuses: list[dict]) -> None:
+    """Write the final status of a batch of jobs in a single UPDATE.
 
-        # 5. Update status to completed
-        t = _StepTimer(str(job_id), "db:update_status_completed")
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE imports SET status = 'completed', stats_json = %s, updated_at = NOW() WHERE id = %s",
-                    (stats, job_id)
+    Rows are decoded with `jsonb_populate_recordset(NULL::imports, ...)` so
+    every value takes the type of its `imports` column, whatever `id` is.
+    """
+    if not statuses:
+        return
+    t = _StepTimer("batch", "db:update_job_statuses")
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # Each finished job is also announced on the `imports_done` channel
+            # (payload: job id) so clients can LISTEN instead of polling
+            # imports.status; notifications are delivered on commit.
+            cur.execute(
+                """
+                WITH updated AS (
+                  UPDATE imports
+                  SET status = data.status,
+                      -- Only the fields each outcome reports are overwritten.
+                      stats_json = COALESCE(data.stats_json, imports.stats_json),
+                      error = COALESCE(data.error, imports.error),
+                      updated_at = NOW()
+                  FROM jsonb_populate_recordset(NULL::imports, %s::jsonb) AS data
+                  WHERE imports.id = data.id
+                  RETURNING imports.id
+                )
+                SELECT pg_notify('imports_done', id::text) FROM updated
+                """,
+                (json.dumps(statuses, default=str),),
+            )
+        conn.commit()
+    t.done("jobs=%d", len(statuses))
+
+# Max jobs claimed per round-trip; more are claimed once a batch is done.
+_CLAIM_BATCH_SIZE = 32
+# A job still 'parsing' this long after its claim lost its final status (the
+# process died, or the flush kept failing) and is claimed again. Re-running a
+# job is safe: leads_raw inserts are ON CONFLICT DO NOTHING.
+_STALE_PARSING_AFTER_S = int(os.environ.get("STALE_PARSING_AFTER_S", 30 * 60))
+# Status flush attempts, and the delay before the first retry (doubled after
+# each failure).
+_FLUSH_ATTEMPTS = 4
+_FLUSH_RETRY_DELAY_S = 1.0
+
+
+def _claim_pending_jobs(include_failed: bool = True) -> list:
+    """Atomically mark a batch of queued imports as 'parsing' and return them.
+
+    FOR UPDATE SKIP LOCKED lets overlapping triggers (or several workers) run
+    at once without picking up the same job twice. Only the columns
+    `process_job` reads are returned, not the (possibly large) stats/error.
+
+    Jobs left in 'parsing' for over `_STALE_PARSING_AFTER_S` are reclaimed
+    too, so a lost status write never strands a job.
+    """
+    statuses = ["queued_parse", "pending"]
+    if include_failed:
+        statuses.append("failed")
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE imports SET status = 'parsing', updated_at = NOW()
+                WHERE id IN (
+                  SELECT id FROM imports
+                  WHERE status = ANY(%s)
+                     OR (status = 'parsing' AND updated_at < NOW() - make_interval(secs => %s))
+                  ORDER BY id
+                  LIMIT %s
+                  FOR UPDATE SKIP LOCKED
                 )
-                conn.commit()
-        t.done(extra=f"stats_json_len={len(stats)}")
+                RETURNING id, storage_key, "Faculdade", "Ano"
+                """,
+                (statuses, _STALE_PARSING_AFTER_S, _CLAIM_BATCH_SIZE),
+            )
+            jobs = cur.fetchall()
+        conn.commit()
+    return jobs
 
-        _log(str(job_id), "Job completed successfully")
 
-    except Exception as e:
-        _log(str(job_id), f"Job failed: {type(e).__name__}: {e}")
+async def process_pending_jobs_task(include_failed: bool = True) -> int:
+    """Process queued imports; returns how many jobs were picked up.
+
+    `include_failed` also retries jobs that previously failed, which is what
+    the `/process-jobs` trigger has always done.
+    """
+    _log("batch", "Starting background job processing...")
+    total = 0
+    while True:
+        try:
+            jobs = await asyncio.to_thread(_claim_pending_jobs, include_failed)
+        except Exception as e:
+            _log("batch", "Error fetching jobs: %s", e)
+            break
+
+        total += len(jobs)
+        await _run_jobs(jobs)
+        if len(jobs) < _CLAIM_BATCH_SIZE:
+            break
+        # Keep draining the queue, but don't re-claim jobs that just failed.
+        include_failed = False
+    return total
+
+
+async def _run_jobs(jobs: list) -> None:
+    _log("batch", "Claimed %d pending jobs", len(jobs))
+
+    # Jobs are dominated by the PDF download and DB round-trips, which release
+    # the GIL, so a few of them run side by side on worker threads. Each one
+    # holds a pooled connection; the pool keeps two more for claim/flush.
+    loop = asyncio.get_running_loop()
+    statuses = await asyncio.gather(
+        *(loop.run_in_executor(_JOB_EXECUTOR, process_job, job) for job in jobs)
+    )
+
+    # One round-trip for the whole batch instead of one UPDATE per job. Until
+    # it lands the jobs stay 'parsing'; their data is already committed. A
+    # transient failure is retried with backoff; if every attempt fails, the
+    # claim picks the jobs up again once they go stale.
+    delay = _FLUSH_RETRY_DELAY_S
+    for attempt in range(1, _FLUSH_ATTEMPTS + 1):
+        try:
+            await asyncio.to_thread(_flush_job_statuses, list(statuses))
+            return
+        except Exception as e:
+            _log("batch", "Error updating job statuses (attempt %d/%d): %s: %s", attempt, _FLUSH_ATTEMPTS, type(e).__name__, e)
+        if attempt < _FLUSH_ATTEMPTS:
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+@app.on_event("startup")
+def check_environment():
+    """Fail at boot rather than mid-batch when the service is misconfigured."""
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL environment variable not set")
+    if not _STORAGE_BASE:
+        print("Warning: SUPABASE_STORAGE_BASE_URL is not set; relative storage keys cannot be downloaded.")
+
+_INIT_INDEXES_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "init_indexes.sql")
+_INDEX_NAME_RE = re.compile(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE)
+# init_indexes.sql starts every statement on a "-- statement" line;
+# "-- statement: required" marks the ones jobs can't run without.
+_STATEMENT_MARKER_RE = re.compile(r"^--\s*statement\b(.*)$", re.MULTILINE)
+
+
+def _load_init_index_statements() -> list[tuple[bool, str]]:
+    """(required, statement) pairs of scripts/init_indexes.sql, in file order."""
+    with open(_INIT_INDEXES_SQL, encoding="utf-8") as f:
+        sql = f.read()
+    # split() alternates text and the marker's captured suffix; whatever
+    # precedes the first marker is the file's header comment.
+    parts = _STATEMENT_MARKER_RE.split(sql)[1:]
+    return [
+        ("required" in suffix, stmt.strip())
+        for suffix, stmt in zip(parts[0::2], parts[1::2])
+        if stmt.strip()
+    ]
+
+
+def _apply_index_statements(statements: list[str], lock_name: str, wait: bool) -> None:
+    """Run `statements` under the `lock_name` advisory lock.
+
+    With `wait`, block until a replica holding the lock is done (so the
+    indexes exist on return); otherwise skip if another replica holds it.
+    A CONCURRENTLY build that fails leaves an INVALID index behind under the
+    same name, which IF NOT EXISTS would then skip forever: those are dropped
+    first so they get rebuilt.
+    """
+    index_names = [m.group(1) for m in map(_INDEX_NAME_RE.search, statements) if m]
+    with get_db_connection() as conn:
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block.
+        conn.autocommit = True
         try:
-            t = _StepTimer(str(job_id), "db:update_status_failed")
-            with get_db_connection() as conn:
-                with conn.cursor() as cur:
+            with conn.cursor() as cur:
+                if wait:
+                    cur.execute("SELECT pg_advisory_lock(hashtext(%s))", (lock_name,))
+                else:
+                    cur.execute("SELECT pg_try_advisory_lock(hashtext(%s)) AS locked", (lock_name,))
+                    if not cur.fetchone()["locked"]:
+                        return
+                try:
                     cur.execute(
-                        "UPDATE imports SET status = 'failed', error = %s, updated_at = NOW() WHERE id = %s",
-                        (str(e), job_id)
+                        """
+                        SELECT c.relname
+                        FROM pg_index i
+                        JOIN pg_class c ON c.oid = i.indexrelid
+                        JOIN pg_namespace n ON n.oid = c.relnamespace
+                        WHERE n.nspname = 'public' AND c.relname = ANY(%s) AND NOT i.indisvalid
+                        """,
+                        (index_names,),
                     )
-                    conn.commit()
-            t.done()
-        except Exception as db_e:
-            _log(str(job_id), f"Failed to update error status: {type(db_e).__name__}: {db_e}")
-
-def process_pending_jobs_task():
-    print("Starting background job processing...")
+                    for row in cur.fetchall():
+                        print(f"Dropping invalid index {row['relname']} to rebuild it")
+                        cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS public."{row["relname"]}"')
+                    for stmt in statements:
+                        cur.execute(stmt)
+                finally:
+                    cur.execute("SELECT pg_advisory_unlock(hashtext(%s))", (lock_name,))
+        finally:
+            conn.autocommit = False
+
+
+def apply_init_indexes(required: bool | None = None) -> None:
+    """Apply scripts/init_indexes.sql, blocking until the builds are done.
+
+    `required=True` applies only the statements jobs depend on (the unique
+    index behind `ON CONFLICT (nome)`), `False` only the rest, `None` both.
+    Every statement is IF NOT EXISTS, so this is a no-op catalog lookup once
+    the indexes exist. Required statements wait for a replica that is
+    already building them; the others are skipped by whoever doesn't get the
+    lock, so concurrently starting replicas never build an index twice.
+    """
+    entries = _load_init_index_statements()
+    groups = (True, False) if required is None else (required,)
+    for group in groups:
+        statements = [stmt for is_required, stmt in entries if is_required == group]
+        part = "required" if group else "secondary"
+        try:
+            _apply_index_statements(
+                statements,
+                lock_name="init_indexes_required" if group else "init_indexes",
+                wait=group,
+            )
+        except psycopg2.Error as e:
+            # Jobs still run; a missing dimension_lead_nome_uq makes them fail
+            # loudly on the ON CONFLICT (nome) upsert.
+            print(f"Warning: could not apply {part} indexes from {_INIT_INDEXES_SQL}: {type(e).__name__}: {e}")
+            continue
+        print(f"Applied {part} indexes from {_INIT_INDEXES_SQL}")
+
+@app.on_event("startup")
+def ensure_indexes():
+    """Create the indexes jobs need before serving, the rest in the background.
+
+    The required unique index is cheap on a fresh (empty) database and a
+    catalog lookup afterwards, so it is created before /process-jobs can
+    run a job against it. Secondary index builds on large tables can take
+    minutes and don't hold up startup; the standalone worker calls
+    `apply_init_indexes` directly and waits for all of them.
+    """
+    apply_init_indexes(required=True)
+    print(f"Applying secondary indexes from {_INIT_INDEXES_SQL} in the background")
+    threading.Thread(
+        target=apply_init_indexes, kwargs={"required": False}, name="init-indexes", daemon=True
+    ).start()
+
+@app.on_event("startup")
+def start_parse_pool():
+    global PARSE_POOL
+    if PARSE_WORKERS <= 0:
+        return
     try:
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                # Fetch pending jobs
-                cur.execute("SELECT * FROM imports WHERE status = 'queued_parse' OR status = 'pending' OR status = 'failed'")
-                jobs = cur.fetchall()
-
-        print(f"Found {len(jobs)} pending jobs")
-
-        for job in jobs:
-            process_job(job)
-
-    except Exception as e:
-        print(f"Error fetching jobs: {e}")
+        # spawn: forking a process that already runs job threads and holds
+        # DB sockets is not safe.
+        PARSE_POOL = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    except (OSError, NotImplementedError) as e:
+        print(f"Parse pool unavailable, parsing inline: {type(e).__name__}: {e}")
+
+@app.on_event("shutdown")
+def close_parse_pool():
+    global PARSE_POOL
+    if PARSE_POOL is not None:
+        PARSE_POOL.shutdown()
+        PARSE_POOL = None
+
+@app.on_event("shutdown")
+def close_db_pool():
+    if _POOL is not None:
+        _POOL.closeall()
 
 @app.get("/")
 def read_root():
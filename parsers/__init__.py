@@ -3,9 +3,24 @@
 We expect multiple PDF layouts over time.
 Selection is based on the `imports."Faculdade"` field.
 
-For now we only have the UFSCar parser implementation.
+Parsers are registered in `dispatcher._REGISTRY`; unknown layouts yield no
+records.
 """
 
-from .dispatcher import extract_records_from_bytes_for_faculdade
+from .dispatcher import (
+    extract_columns_from_bytes_for_faculdade,
+    extract_columns_from_file_for_faculdade,
+    extract_columns_from_path_for_faculdade,
+    extract_records_from_bytes_for_faculdade,
+    extract_records_from_file_for_faculdade,
+    extract_records_from_path_for_faculdade,
+)
 
-__all__ = ["extract_records_from_bytes_for_faculdade"]
+__all__ = [
+    "extract_columns_from_bytes_for_faculdade",
+    "extract_columns_from_file_for_faculdade",
+    "extract_columns_from_path_for_faculdade",
+    "extract_records_from_bytes_for_faculdade",
+    "extract_records_from_file_for_faculdade",
+    "extract_records_from_path_for_faculdade",
+]
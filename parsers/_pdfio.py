@@ -0,0 +1,29 @@
+"""Input handling shared by the PDF parsers.
+
+Parsers accept the raw PDF bytes, an already-open binary file object (e.g.
+the spooled temp file a download was streamed into) or a filesystem path, so
+callers don't have to materialize large PDFs in memory first. Paths are
+handed to the PDF library as-is and read straight from disk.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from typing import BinaryIO, Union
+
+PdfSource = Union[bytes, bytearray, BinaryIO, str, os.PathLike]
+
+
+def is_path(source: PdfSource) -> bool:
+    """Return True if `source` names a file rather than holding its content."""
+
+    return isinstance(source, (str, os.PathLike))
+
+
+def as_stream(source: PdfSource) -> BinaryIO:
+    """Return a seekable binary stream for in-memory or file-object `source`."""
+
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
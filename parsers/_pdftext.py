@@ -0,0 +1,68 @@
+"""Plain page text extraction shared by the PDF parsers.
+
+Parsers that only need line-oriented text use `page_texts()` instead of
+pdfplumber's `extract_text()`: pypdfium2 runs PDFium's C++ text extractor,
+while pdfplumber rebuilds per-character layout in pure Python, which is the
+bulk of a job's parse time. pdfplumber stays as the fallback when pypdfium2
+isn't importable.
+
+Only switch a parser over after checking its output on the fixtures: PDFium
+orders and splits lines slightly differently from pdfminer on some layouts.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Iterator
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover - pdfplumber-only installs
+    pdfium = None
+
+import pdfplumber
+
+from ._pdfio import PdfSource, as_stream, is_path
+
+# PDFium is not thread-safe and jobs may parse inline on several threads
+# (PARSE_WORKERS=0), so calls into it are serialized per process.
+_PDFIUM_LOCK = threading.Lock()
+
+
+def clean_spaces(s: str) -> str:
+    """Collapse whitespace runs to one space and strip the ends.
+
+    str.split() splits on the same Unicode whitespace as \\s (NBSP and line
+    breaks included), without going through the regex engine on every line.
+    """
+
+    return " ".join(s.split())
+
+
+def page_texts(source: PdfSource) -> Iterator[str]:
+    """Yield the text of each page of `source`, one string per page."""
+
+    if pdfium is None:
+        with pdfplumber.open(source if is_path(source) else as_stream(source)) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text() or ""
+                page.close()
+                yield text
+        return
+
+    texts = []
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                try:
+                    texts.append(textpage.get_text_range())
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            pdf.close()
+    # PDFium separates lines with CRLF; parsers expect "\n".
+    for text in texts:
+        yield text.replace("\r\n", "\n")
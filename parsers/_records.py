@@ -0,0 +1,50 @@
+"""Column-oriented parser output.
+
+Parsers hand their records back as four parallel lists (nomes, cursos, tipos,
+periodos) instead of one dict per candidate: the pipeline only ever zips
+them into COPY rows, and four lists of strings pickle much smaller than N
+dicts when parsing runs in a worker process.
+
+`to_dicts()` rebuilds the historical list-of-dicts shape for callers that
+still want it.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+RecordColumns = tuple[list[str], list[str], list[str], list[str]]
+
+COLUMN_NAMES = ("nome", "curso", "tipo", "periodo")
+
+
+def empty_columns() -> RecordColumns:
+    return [], [], [], []
+
+
+def to_columns(records: Iterable[Any], dedup: bool = False) -> RecordColumns:
+    """Transpose records with nome/curso/tipo/periodo attributes into columns.
+
+    With `dedup`, only the first record per (nome, curso) is kept.
+    """
+
+    if dedup:
+        # dicts keep insertion order, so the survivors stay in input order.
+        first: dict[tuple[str, str], Any] = {}
+        for r in records:
+            first.setdefault((r.nome, r.curso), r)
+        records = first.values()
+
+    nomes, cursos, tipos, periodos = columns = empty_columns()
+    for r in records:
+        nomes.append(r.nome)
+        cursos.append(r.curso)
+        tipos.append(r.tipo)
+        periodos.append(r.periodo)
+    return columns
+
+
+def to_dicts(columns: RecordColumns) -> list[dict]:
+    """Rebuild the list of {nome, curso, tipo, periodo} dicts from columns."""
+
+    return [dict(zip(COLUMN_NAMES, row)) for row in zip(*columns)]
@@ -1,24 +1,31 @@
 """PDF parser dispatcher.
 
 Contract:
-- Input: raw PDF bytes + faculdade name (from `imports."Faculdade"`).
-- Output: list of dicts with keys: nome, curso, tipo, periodo.
+- Input: raw PDF bytes (or a binary file object, or a path) + faculdade name
+  (from `imports."Faculdade"`).
+- Output: the records as four parallel lists (nomes, cursos, tipos,
+  periodos); see `parsers/_records.py`. The `extract_records_*` variants
+  return the same records as a list of dicts with keys: nome, curso, tipo,
+  periodo.
 
 No `campus` field: the pipeline no longer stores it.
 """
 
 from __future__ import annotations
 
-from typing import Callable, Iterable, Mapping, Any
+import os
+from typing import BinaryIO, Callable
 
-from .ufscar import extract_records_from_bytes as extract_ufscar
-from .fuvest import extract_records_from_bytes as extract_fuvest
-from .provao import extract_records_from_bytes as extract_provao
-from .ifsp import extract_records_from_bytes as extract_ifsp
-from .enem_usp import extract_records_from_bytes as extract_enem_usp
+from ._pdfio import PdfSource
+from ._records import RecordColumns, empty_columns, to_dicts
+from .ufscar import extract_columns_from_bytes as extract_ufscar
+from .fuvest import extract_columns_from_bytes as extract_fuvest
+from .provao import extract_columns_from_bytes as extract_provao
+from .ifsp import extract_columns_from_bytes as extract_ifsp
+from .enem_usp import extract_columns_from_bytes as extract_enem_usp
 
 
-ParserFn = Callable[[bytes], list[dict]]
+ParserFn = Callable[[PdfSource], RecordColumns]
 
 
 def _norm_faculdade(faculdade: str | None) -> str:
@@ -35,13 +42,52 @@ _REGISTRY: dict[str, ParserFn] = {
 }
 
 
-def extract_records_from_bytes_for_faculdade(file_bytes: bytes, faculdade: str | None) -> list[dict]:
+def extract_columns_from_bytes_for_faculdade(file_bytes: PdfSource, faculdade: str | None) -> RecordColumns:
     """Route PDF bytes to the right parser based on faculdade.
 
-    If faculdade is unknown, we currently fall back to the UFSCar parser to keep
-    the system operational (multi-parser rollout will add more explicit support).
+    If faculdade has no registered parser, no records are returned (empty
+    columns) rather than guessing at the layout.
     """
 
     key = _norm_faculdade(faculdade)
     fn = _REGISTRY.get(key)
-    return fn(file_bytes) if fn else []
+    return fn(file_bytes) if fn else empty_columns()
+
+
+def extract_columns_from_file_for_faculdade(file_obj: BinaryIO, faculdade: str | None) -> RecordColumns:
+    """Same as `extract_columns_from_bytes_for_faculdade`, reading from a file.
+
+    `file_obj` must be a seekable binary stream positioned at the start of the
+    PDF (e.g. a `tempfile.SpooledTemporaryFile` a download was streamed into),
+    so large PDFs never need to be held in memory as a single bytes object.
+    """
+
+    return extract_columns_from_bytes_for_faculdade(file_obj, faculdade)
+
+
+def extract_columns_from_path_for_faculdade(path: str | os.PathLike, faculdade: str | None) -> RecordColumns:
+    """Same as `extract_columns_from_bytes_for_faculdade`, for a PDF on disk.
+
+    The path goes straight to the PDF library, which reads the file itself:
+    the PDF is never copied into a Python bytes object.
+    """
+
+    return extract_columns_from_bytes_for_faculdade(path, faculdade)
+
+
+def extract_records_from_bytes_for_faculdade(file_bytes: PdfSource, faculdade: str | None) -> list[dict]:
+    """`extract_columns_from_bytes_for_faculdade`, as a list of dicts."""
+
+    return to_dicts(extract_columns_from_bytes_for_faculdade(file_bytes, faculdade))
+
+
+def extract_records_from_file_for_faculdade(file_obj: BinaryIO, faculdade: str | None) -> list[dict]:
+    """`extract_columns_from_file_for_faculdade`, as a list of dicts."""
+
+    return to_dicts(extract_columns_from_file_for_faculdade(file_obj, faculdade))
+
+
+def extract_records_from_path_for_faculdade(path: str | os.PathLike, faculdade: str | None) -> list[dict]:
+    """`extract_columns_from_path_for_faculdade`, as a list of dicts."""
+
+    return to_dicts(extract_columns_from_path_for_faculdade(path, faculdade))
@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
-import io
 import re
-from dataclasses import dataclass, asdict
-from typing import List
+from dataclasses import dataclass
+from typing import Iterator, List
 
-import pdfplumber
+from ._pdfio import PdfSource
+from ._pdftext import clean_spaces, page_texts
+from ._records import RecordColumns, to_columns, to_dicts
 
 
 COURSE_RE = re.compile(
@@ -18,9 +19,13 @@ HEADER_SKIP_RE = re.compile(
     r"^(ENEM\s+USP\s+\d+|CHAMADOS\s+PARA\s+A\s+PRIMEIRA\s+MATR[IÍ]CULA|PROCESSAMENTO\s+REALIZADO)",
     re.IGNORECASE,
 )
+# PDFium sometimes drops the line breaks inside an institution block, so the
+# institution line and all its candidates come out as one line. Every
+# candidate row starts with "<n> <ddd.ddd> ", which is where it's split back.
+CANDIDATE_SPLIT_RE = re.compile(r"\s+(?=\d+\s+\d{3}\.\d{3}\s)")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Record:
     nome: str
     curso: str
@@ -28,12 +33,8 @@ class Record:
     periodo: str
 
 
-def _clean_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s.replace("\u00a0", " ")).strip()
-
-
 def _is_sao_carlos_campus(text: str) -> bool:
-    c = _clean_spaces(text).lower()
+    c = clean_spaces(text).lower()
     return "sao carlos" in c or "são carlos" in c
 
 
@@ -41,53 +42,61 @@ def _looks_like_institution_line(text: str) -> bool:
     return "usp" in text.lower()
 
 
-def extract_records_from_bytes(file_bytes: bytes) -> List[dict]:
+def _iter_lines(file_bytes: PdfSource) -> Iterator[str]:
+    """Yield the cleaned, non-empty text lines of every page."""
+
+    split_rows = CANDIDATE_SPLIT_RE.split
+    for text in page_texts(file_bytes):
+        for raw_line in text.splitlines():
+            for piece in split_rows(raw_line):
+                line = clean_spaces(piece)
+                if line:
+                    yield line
+
+
+def extract_columns_from_bytes(file_bytes: PdfSource) -> RecordColumns:
     records: list[Record] = []
     current_course: tuple[str, str, str] | None = None
     current_institution: str = ""
+    # Bound once: these run for every line of every page.
+    skip_header = HEADER_SKIP_RE.match
+    match_course = COURSE_RE.match
+    match_candidate = CANDIDATE_RE.match
+
+    for line in _iter_lines(file_bytes):
+        if skip_header(line):
+            continue
 
-    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text(layout=True) or ""
-            for raw_line in text.splitlines():
-                line = _clean_spaces(raw_line)
-                if not line:
-                    continue
-                if HEADER_SKIP_RE.match(line):
-                    continue
-
-                course_match = COURSE_RE.match(line)
-                if course_match:
-                    current_course = (
-                        _clean_spaces(course_match.group("curso")),
-                        _clean_spaces(course_match.group("tipo")),
-                        _clean_spaces(course_match.group("periodo")),
-                    )
-                    current_institution = ""
-                    continue
-
-                if _looks_like_institution_line(line):
-                    current_institution = line
-                    continue
-
-                candidate_match = CANDIDATE_RE.match(line)
-                if candidate_match and current_course:
-                    if _is_sao_carlos_campus(current_institution):
-                        curso, tipo, periodo = current_course
-                        nome = _clean_spaces(candidate_match.group("nome"))
-                        records.append(Record(nome=nome, curso=curso, tipo=tipo, periodo=periodo))
-                    continue
-
-    deduped: list[Record] = []
-    seen: set[tuple[str, str]] = set()
-    for r in records:
-        key = (r.nome, r.curso)
-        if key in seen:
+        # Cheap substring/first-char checks keep most lines from ever
+        # reaching COURSE_RE (which backtracks over the whole line) and
+        # CANDIDATE_RE.
+        course_match = match_course(line) if "(" in line else None
+        if course_match:
+            current_course = (
+                clean_spaces(course_match.group("curso")),
+                clean_spaces(course_match.group("tipo")),
+                clean_spaces(course_match.group("periodo")),
+            )
+            current_institution = ""
             continue
-        seen.add(key)
-        deduped.append(r)
 
-    return [asdict(r) for r in deduped]
+        if _looks_like_institution_line(line):
+            current_institution = line
+            continue
+
+        candidate_match = match_candidate(line) if line[0].isdigit() else None
+        if candidate_match and current_course:
+            if _is_sao_carlos_campus(current_institution):
+                curso, tipo, periodo = current_course
+                nome = clean_spaces(candidate_match.group("nome"))
+                records.append(Record(nome=nome, curso=curso, tipo=tipo, periodo=periodo))
+            continue
+
+    return to_columns(records, dedup=True)
+
+
+def extract_records_from_bytes(file_bytes: PdfSource) -> List[dict]:
+    return to_dicts(extract_columns_from_bytes(file_bytes))
 
 
 if __name__ == "__main__":
@@ -95,7 +104,7 @@ if __name__ == "__main__":
     from pprint import pprint
 
     if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} <enem-usp-pdf-file>", file=sys.stderr)
+        print("Usage: python -m parsers.enem_usp <enem-usp-pdf-file>", file=sys.stderr)
         sys.exit(1)
 
     with open(sys.argv[1], "rb") as f:
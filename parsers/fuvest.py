@@ -9,19 +9,32 @@ returned (inner join to Campus São Carlos courses).
 from __future__ import annotations
 
 import csv
-import io
 import re
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 
-import pdfplumber
+from ._pdfio import PdfSource
+from ._pdftext import clean_spaces, page_texts
+from ._records import RecordColumns, to_columns, to_dicts
 
 CPF_RE = re.compile(r"^\d{3}\.\d{3}$")
 CODE_FULL_RE = re.compile(r"^\d{3}[\-−]\d{2}$")
-
-
-@dataclass(frozen=True)
+# Codes split across two tokens: "513−2" "5" and "313−" "54".
+CODE_ONE_DIGIT_RE = re.compile(r"^\d{3}[\-−]\d$")
+CODE_NO_DIGITS_RE = re.compile(r"^\d{3}[\-−]$")
+# Page furniture. Each page opens with a header block (title, "1ª Chamada"
+# line, column headers) and closes with a footer block ("De <nome>",
+# "Até <nome>", page number); sections open with a letter divider ("A" then
+# "AAAA…"). These are only matched in those positions: anywhere else a line
+# like "De Souza" or "E" is the wrapped tail of a candidate's name.
+PAGE_HEADER_RE = re.compile(r"^FUVEST\s+\d{4}\b")
+COLUMN_HEADER_RE = re.compile(r"^NOME\s+CPF\s+CURSO", re.IGNORECASE)
+PAGE_NUMBER_RE = re.compile(r"^\d+/\d+$")
+CPF_SEARCH_RE = re.compile(r"(?<!\S)\d{3}\.\d{3}(?!\S)")
+
+
+@dataclass(frozen=True, slots=True)
 class Record:
     nome: str
     curso: str
@@ -29,42 +42,32 @@ class Record:
     periodo: str
 
 
-@dataclass(frozen=True)
-class DimensionRow:
-    curso: str
-    tipo: str
-    periodo: str
-
-
-_DIMENSION_CACHE: Dict[str, DimensionRow] | None = None
-
-
-def _load_dimension_map() -> Dict[str, DimensionRow]:
-    global _DIMENSION_CACHE
-    if _DIMENSION_CACHE is not None:
-        return _DIMENSION_CACHE
+def _load_dimension_map() -> Dict[str, Tuple[str, str, str]]:
+    """Read ``codigo-dimension.csv`` as {codigo: (curso, tipo, periodo)}."""
 
     path = Path(__file__).with_name("codigo-dimension.csv")
-    mapping: Dict[str, DimensionRow] = {}
+    mapping: Dict[str, Tuple[str, str, str]] = {}
     with path.open("r", newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             codigo = row.get("CODIGO", "").strip()
             if not codigo:
                 continue
-            mapping[codigo] = DimensionRow(
-                curso=row.get("CURSO", "").strip(),
-                tipo=row.get("TIPO", "").strip(),
-                periodo=row.get("PERIODO", "").strip(),
+            mapping[codigo] = (
+                row.get("CURSO", "").strip(),
+                row.get("TIPO", "").strip(),
+                row.get("PERIODO", "").strip(),
             )
-
-    _DIMENSION_CACHE = mapping
     return mapping
 
 
+# Loaded once at import, so worker processes pay for it at startup rather
+# than on their first job.
+_DIMENSION = _load_dimension_map()
+
+
 def _clean_name(raw: str) -> str:
-    cleaned = re.sub(r"\s+", " ", raw.replace("\u00a0", " ")).strip()
-    return cleaned.replace("...", "")
+    return clean_spaces(raw).replace("...", "")
 
 
 def _normalize_code(raw: str) -> str | None:
@@ -74,26 +77,24 @@ def _normalize_code(raw: str) -> str | None:
     return None
 
 
-def _consume_code(tokens: List[str], start: int) -> Tuple[str | None, int]:
-    """Return (normalized_code, consumed_tokens_after_start)."""
+def _consume_code(first: str, next_token: str) -> Tuple[str | None, int]:
+    """Return (normalized_code, consumed_tokens) for the tokens after a CPF.
 
-    if start >= len(tokens):
-        return None, 0
+    `next_token` is "" at the end of the document.
+    """
 
-    first = tokens[start]
     consumed = 1
 
     # Handle splits like "106" "−13" or "513−2" "5" or "313−" "54".
     pieces = [first]
-    next_token = tokens[start + 1] if start + 1 < len(tokens) else ""
 
     if ("−" not in first and "-" not in first) and next_token.startswith("−"):
         pieces.append(next_token)
         consumed = 2
-    elif re.match(r"^\d{3}[\-−]\d$", first) and next_token.isdigit():
+    elif CODE_ONE_DIGIT_RE.match(first) and next_token.isdigit():
         pieces.append(next_token)
         consumed = 2
-    elif re.match(r"^\d{3}[\-−]$", first) and next_token.isdigit():
+    elif CODE_NO_DIGITS_RE.match(first) and next_token.isdigit():
         pieces.append(next_token)
         consumed = 2
     elif CODE_FULL_RE.match(first):
@@ -103,59 +104,126 @@ def _consume_code(tokens: List[str], start: int) -> Tuple[str | None, int]:
     return _normalize_code(raw_code), consumed
 
 
-def extract_records_from_bytes(file_bytes: bytes) -> List[dict]:
-    dimension = _load_dimension_map()
-    records: List[Record] = []
+def _strip_page_furniture(lines: List[str]) -> List[str]:
+    """Drop a page's header and footer blocks and its letter dividers.
+
+    >>> _strip_page_furniture([
+    ...     "FUVEST 2025 Lista de Publicação",
+    ...     "1ª Chamada − Chamados para Matrícula",
+    ...     "NOME CPF CURSO NOME CPF CURSO",
+    ...     "A",
+    ...     "AAAAAAAAAA",
+    ...     "Ana Maria 123.456 309−21",
+    ...     "Bruno Pereira",
+    ...     "De Souza 654.321 116−37",
+    ...     "Carla",
+    ...     "De Souza",
+    ...     "E",
+    ...     "111.222 502−08",
+    ...     "De Ana Maria",
+    ...     "Até Carla De Souza E",
+    ...     "1/35",
+    ... ])  # doctest: +NORMALIZE_WHITESPACE
+    ['Ana Maria 123.456 309−21', 'Bruno Pereira', 'De Souza 654.321 116−37',
+     'Carla', 'De Souza', 'E', '111.222 502−08']
+    """
+
+    start, end = 0, len(lines)
+    if lines and PAGE_HEADER_RE.match(lines[0]):
+        for i, line in enumerate(lines):
+            if COLUMN_HEADER_RE.match(line):
+                start = i + 1
+                break
+            if CPF_SEARCH_RE.search(line):
+                break
+    if (
+        end - start >= 3
+        and PAGE_NUMBER_RE.match(lines[-1])
+        and lines[-3].startswith("De ")
+        and lines[-2].startswith("Até ")
+    ):
+        end -= 3
+
+    kept: List[str] = []
+    i = start
+    while i < end:
+        line = lines[i]
+        # A divider is a single capital letter followed by a run of it.
+        if (
+            len(line) == 1
+            and line.isupper()
+            and i + 1 < end
+            and len(lines[i + 1]) > 1
+            and lines[i + 1] == line * len(lines[i + 1])
+        ):
+            i += 2
+            continue
+        kept.append(line)
+        i += 1
+    return kept
+
+
+def _iter_tokens(file_bytes: PdfSource) -> Iterator[str]:
+    """Yield the whitespace-separated tokens of every page, skipping furniture.
+
+    Otherwise the page header/footer text ends up prepended to the name of
+    the page's first candidate.
+    """
 
-    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-        tokens: List[str] = []
-        for page in pdf.pages:
-            text = page.extract_text(layout=False) or ""
-            for line in text.split("\n"):
-                # Skip obvious headers.
-                if line.strip().upper().startswith("NOME CPF CURSO"):
-                    continue
-                tokens.extend(line.split())
+    for text in page_texts(file_bytes):
+        lines = [line for line in map(str.strip, text.split("\n")) if line]
+        for line in _strip_page_furniture(lines):
+            yield from line.split()
+
+
+def extract_columns_from_bytes(file_bytes: PdfSource) -> RecordColumns:
+    dimension = _DIMENSION
+    records: List[Record] = []
 
+    # Single streaming pass: names and codes are matched as the pages are
+    # read, instead of collecting every token of the PDF first. Codes may
+    # continue on the next line or page, so one token of lookahead is kept in
+    # `pending`.
+    tokens = _iter_tokens(file_bytes)
     name_tokens: List[str] = []
-    i = 0
-    while i < len(tokens):
-        tok = tokens[i]
-        if CPF_RE.match(tok):
-            nome = _clean_name(" ".join(name_tokens))
-            code, consumed = _consume_code(tokens, i + 1)
-            i += consumed
-            if nome and code and code in dimension:
-                dim = dimension[code]
-                records.append(
-                    Record(
-                        nome=nome,
-                        curso=dim.curso,
-                        tipo=dim.tipo,
-                        periodo=dim.periodo,
-                    )
-                )
-            name_tokens = []
+    pending: str | None = None
+    is_cpf = CPF_RE.match
+    while True:
+        if pending is not None:
+            tok, pending = pending, None
         else:
-            name_tokens.append(tok)
-        i += 1
+            tok = next(tokens, None)
+            if tok is None:
+                break
 
-    deduped: list[Record] = []
-    seen: set[tuple[str, str]] = set()
-    for r in records:
-        key = (r.nome, r.curso)
-        if key in seen:
+        if not is_cpf(tok):
+            name_tokens.append(tok)
             continue
-        seen.add(key)
-        deduped.append(r)
 
-    return [asdict(r) for r in deduped]
+        nome = _clean_name(" ".join(name_tokens))
+        name_tokens = []
+        first = next(tokens, None)
+        if first is None:
+            break
+        next_token = next(tokens, None)
+        code, consumed = _consume_code(first, next_token or "")
+        if consumed == 1:
+            pending = next_token
+        dim = dimension.get(code) if nome and code else None
+        if dim is not None:
+            records.append(Record(nome, *dim))
+
+    return to_columns(records, dedup=True)
+
+
+def extract_records_from_bytes(file_bytes: PdfSource) -> List[dict]:
+    return to_dicts(extract_columns_from_bytes(file_bytes))
 
 if __name__ == "__main__":
     import sys
 
     if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} <fuvest-pdf-file>", file=sys.stderr)
+        print("Usage: python -m parsers.fuvest <fuvest-pdf-file>", file=sys.stderr)
         sys.exit(1)
 
     pdf_path = Path(sys.argv[1])
@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
-import io
 import re
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import List
 
-import pdfplumber
+from ._pdfio import PdfSource
+from ._pdftext import clean_spaces, page_texts
+from ._records import RecordColumns, to_columns, to_dicts
 
 
 HEADER_RE = re.compile(
@@ -19,7 +20,7 @@ CANDIDATE_RE = re.compile(
 )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Record:
     nome: str
     curso: str
@@ -27,54 +28,46 @@ class Record:
     periodo: str
 
 
-def _clean_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s.replace("\u00a0", " ")).strip()
-
-
-def extract_records_from_bytes(file_bytes: bytes) -> List[dict]:
+def extract_columns_from_bytes(file_bytes: PdfSource) -> RecordColumns:
     curso = ""
     tipo = ""
     periodo = ""
     records: list[Record] = []
-
-    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for raw_line in text.splitlines():
-                line = _clean_spaces(raw_line)
-                if not line:
+    # Bound once: this runs for every line of every page.
+    match_candidate = CANDIDATE_RE.match
+
+    for text in page_texts(file_bytes):
+        for raw_line in text.splitlines():
+            line = clean_spaces(raw_line)
+            if not line:
+                continue
+
+            if not curso and "campus" in line.lower():
+                header_match = HEADER_RE.search(line)
+                if header_match:
+                    tipo = clean_spaces(header_match.group("tipo"))
+                    curso = clean_spaces(header_match.group("curso"))
+                    periodo = clean_spaces(header_match.group("periodo"))
                     continue
 
-                if not curso:
-                    header_match = HEADER_RE.search(line)
-                    if header_match:
-                        tipo = _clean_spaces(header_match.group("tipo"))
-                        curso = _clean_spaces(header_match.group("curso"))
-                        periodo = _clean_spaces(header_match.group("periodo"))
-                        continue
-
-                candidate_match = CANDIDATE_RE.match(line)
-                if candidate_match and curso:
-                    nome = _clean_spaces(candidate_match.group("nome"))
-                    records.append(Record(nome=nome, curso=curso, tipo=tipo, periodo=periodo))
-
-    deduped: list[Record] = []
-    seen: set[tuple[str, str]] = set()
-    for r in records:
-        key = (r.nome, r.curso)
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(r)
-
-    return [asdict(r) for r in deduped]
+            # Candidate rows start with the 12-digit inscription number.
+            candidate_match = match_candidate(line) if line[0].isdigit() else None
+            if candidate_match and curso:
+                nome = clean_spaces(candidate_match.group("nome"))
+                records.append(Record(nome=nome, curso=curso, tipo=tipo, periodo=periodo))
+
+    return to_columns(records, dedup=True)
+
+
+def extract_records_from_bytes(file_bytes: PdfSource) -> List[dict]:
+    return to_dicts(extract_columns_from_bytes(file_bytes))
 
 if __name__ == "__main__":
     import sys
     from pprint import pprint
 
     if len(sys.argv) != 2:
-        print("Usage: python ifsp.py <pdf-file>")
+        print("Usage: python -m parsers.ifsp <pdf-file>", file=sys.stderr)
         sys.exit(1)
 
     pdf_path = sys.argv[1]
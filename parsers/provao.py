@@ -11,13 +11,14 @@ We only ingest candidates for São Carlos campuses.
 
 from __future__ import annotations
 
-import io
 import re
-import unicodedata
-from dataclasses import dataclass, asdict
-from typing import Any, List
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Iterable, List
 
-import pdfplumber
+from ._pdfio import PdfSource
+from ._pdftext import clean_spaces, page_texts
+from ._records import RecordColumns, to_columns, to_dicts
 
 
 # --- New format (2025+) ---
@@ -34,15 +35,36 @@ NEW_ROW_RE = re.compile(
     r"^(?P<nome>.+?)\s+(?P<id>\*{3}\d{1,3}[\.,]\d{3}\*{2})\s+(?P<grupo>[A-Z])\s+(?P<curso_blob>.+)$"
 )
 
+# Header/footer lines of the new layout.
+NEW_SKIP_RE = re.compile(r"Provão Paulista|Lista de convocação|(?i:nome do candidato)")
+
 # Old format (kept for backward compatibility)
-NAME_LINE_RE = re.compile(r"^\d{1,3}\.\d{3}\s+(?P<nome>.+)$")
-COURSE_LINE_RE = re.compile(
-    r"^\d+(?:/[\dA-Za-z]+)?\s+(?P<curso>.+?)\s*\((?P<tipo>[^)]+)\)\s*-\s*(?P<periodo>.+)$"
+OLD_SKIP_RE = re.compile(r"^(?:Provão Paulista|Processamento)|Lista de Espera")
+# One match per line tells the digit-led line kinds apart:
+#   position: "12/345"
+#   name:     "123.456 <NOME>"
+#   course:   "<codigo>[/<sufixo>] <curso> (<tipo>) - <periodo>"
+OLD_LINE_RE = re.compile(
+    r"^(?:"
+    r"(?P<position>\d+/\d+)"
+    r"|\d{1,3}\.\d{3}\s+(?P<nome>.+)"
+    r"|\d+(?:/[\dA-Za-z]+)?\s+(?P<curso>.+?)\s*\((?P<tipo>[^)]+)\)\s*-\s*(?P<periodo>.+)"
+    r")$"
+)
+# Trailing "(Bacharelado)"-style tipo of a course segment.
+TIPO_SUFFIX_RE = re.compile(r"\((?P<tipo>[^)]+)\)\s*$")
+
+# Lowercase accent fold for the campus check: precomposed Portuguese letters
+# map to their base letter, and stray combining marks (decomposed text) are
+# dropped, which is all the old NFKD + combining() filter did here.
+_ASCII_FOLD = str.maketrans(
+    "áàâãäéèêëíìîïóòôõöúùûüç",
+    "aaaaaeeeeiiiiooooouuuuc",
+    "".join(map(chr, range(0x0300, 0x0370))),
 )
-POSITION_RE = re.compile(r"^\d+/\d+$")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Record:
     nome: str
     curso: str
@@ -50,19 +72,19 @@ class Record:
     periodo: str
 
 
-def _clean_spaces(s: str) -> str:
-    # Also normalize line-wrapped words that pdfplumber may emit with newlines.
-    s = s.replace("\u00a0", " ").replace("\n", " ")
-    return re.sub(r"\s+", " ", s).strip()
-
-
+# Course blobs (and old-layout campus lines) repeat for every candidate of a
+# course: a few hundred distinct values for thousands of rows, so the
+# predicates below are memoized.
+@lru_cache(maxsize=4096)
 def _is_sao_carlos_campus(raw: str) -> bool:
-    c = _clean_spaces(raw).lower()
-    c = unicodedata.normalize("NFKD", c)
-    c = "".join(ch for ch in c if not unicodedata.combining(ch))
-    return "sao carlos" in c
+    c = clean_spaces(raw).lower()
+    # "carlos" has no accents to fold: skip the fold when it's absent.
+    if "carlos" not in c:
+        return False
+    return "sao carlos" in c.translate(_ASCII_FOLD)
 
 
+@lru_cache(maxsize=4096)
 def _is_usp_institution(course_blob: str) -> bool:
         """Return True if the course blob belongs to USP.
 
@@ -70,10 +92,21 @@ def _is_usp_institution(course_blob: str) -> bool:
             "USP - 90011/104 - ..."
         """
 
-        first = _clean_spaces(course_blob.split(" - ", 1)[0]).upper()
+        first = clean_spaces(course_blob.split(" - ", 1)[0]).upper()
         return first == "USP"
 
 
+def _extract_tipo_from_curso(curso_text: str) -> tuple[str, str]:
+    """Split a trailing "(...)" tipo off a course segment."""
+
+    m = TIPO_SUFFIX_RE.search(curso_text)
+    if not m:
+        return clean_spaces(curso_text), ""
+    # The suffix match is the one a `\s*\(...\)\s*$` strip would remove.
+    return clean_spaces(curso_text[: m.start()]), clean_spaces(m.group("tipo"))
+
+
+@lru_cache(maxsize=4096)
 def _split_course_blob(course_blob: str) -> tuple[str, str, str]:
     """Parse '<instituição> - <código> - <curso> - <periodo> - <local>' blobs.
 
@@ -87,20 +120,14 @@ def _split_course_blob(course_blob: str) -> tuple[str, str, str]:
     - The first segment is the institution label (USP/UNESP/FATEC/UNICAMP) and is
       *not* our `tipo` field.
     - `tipo` is usually inside the course segment as a trailing "(...)".
+    - Memoized like the predicates above: blobs repeat for every candidate
+      of a course.
     """
 
-    parts = [_clean_spaces(p) for p in course_blob.split(" - ") if _clean_spaces(p)]
+    parts = [p for p in map(clean_spaces, course_blob.split(" - ")) if p]
     if not parts:
         return "", "", ""
 
-    def _extract_tipo_from_curso(curso_text: str) -> tuple[str, str]:
-        m = re.search(r"\((?P<tipo>[^)]+)\)\s*$", curso_text)
-        if not m:
-            return _clean_spaces(curso_text), ""
-        tipo_local = _clean_spaces(m.group("tipo"))
-        curso_clean = _clean_spaces(re.sub(r"\s*\([^)]+\)\s*$", "", curso_text))
-        return curso_clean, tipo_local
-
     # Typical layout: INSTITUICAO - CODIGO - CURSO - PERIODO - LOCAL
     if len(parts) >= 4:
         periodo = parts[-2]
@@ -118,43 +145,48 @@ def _split_course_blob(course_blob: str) -> tuple[str, str, str]:
     return curso, tipo, ""
 
 
-def _iter_new_format_rows(pdf: Any) -> List[str]:
-    """Return a list of reconstructed logical rows for the new table format.
+def _iter_new_format_rows(texts: Iterable[str]) -> List[re.Match]:
+    """Return the NEW_ROW_RE matches of the reconstructed logical rows.
 
-    pdfplumber sometimes wraps long rows into multiple lines. We rebuild a row
-    by accumulating text until we have seen the masked id and the group token.
+    `texts` holds the text of each page. Long rows are often wrapped into
+    multiple lines. We rebuild a row by accumulating text until we have seen
+    the masked id and the group token.
     """
 
-    rows: list[str] = []
+    rows: list[re.Match] = []
+    # Lines are stored already cleaned (stripped, single-spaced), so joining
+    # them with one space gives a clean row without another clean_spaces pass.
     buffer: list[str] = []
 
     def flush_if_row() -> None:
         if not buffer:
             return
-        candidate = _clean_spaces(" ".join(buffer))
-        if NEW_ROW_RE.match(candidate):
-            rows.append(candidate)
+        m = NEW_ROW_RE.match(" ".join(buffer))
+        if m:
+            rows.append(m)
             buffer.clear()
 
-    for page in pdf.pages:
-        # layout=False tends to avoid inserting awkward line breaks inside words.
-        text = page.extract_text(layout=False) or ""
+    for text in texts:
         for raw_line in text.splitlines():
-            line = _clean_spaces(raw_line)
+            line = clean_spaces(raw_line)
             if not line:
                 continue
 
             # Skip headers/footers for the new PDF.
-            if line.startswith("Provão Paulista"):
-                continue
-            if line.startswith("Lista de convocação"):
+            if NEW_SKIP_RE.match(line):
                 continue
-            if line.lower().startswith("nome do candidato"):
+
+            # PDFium emits the group letter of a wrapped row on a line of its
+            # own, after the wrapped tail: put it back after the masked id.
+            if buffer and len(line) == 1 and line.isupper():
+                candidate = " ".join(buffer)
+                buffer[:] = [MASKED_ID_RE.sub(lambda m: f"{m.group(0)} {line}", candidate, count=1)]
+                flush_if_row()
                 continue
 
             # Many lines are actually multiple columns merged; treat every line
             # as a continuation unless it's the start of a new row.
-            if MASKED_ID_RE.search(line):
+            if "***" in line and MASKED_ID_RE.search(line):
                 # Likely start (or middle) of a row.
                 buffer.append(line)
                 flush_if_row()
@@ -166,102 +198,93 @@ def _iter_new_format_rows(pdf: Any) -> List[str]:
 
     # Best-effort flush at end
     if buffer:
-        candidate = _clean_spaces(" ".join(buffer))
-        if NEW_ROW_RE.match(candidate):
-            rows.append(candidate)
+        m = NEW_ROW_RE.match(" ".join(buffer))
+        if m:
+            rows.append(m)
 
     return rows
 
 
-def extract_records_from_bytes(file_bytes: bytes) -> List[dict]:
+def extract_columns_from_bytes(file_bytes: PdfSource) -> RecordColumns:
     records: list[Record] = []
 
-    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-        # Try new format first.
-        for row in _iter_new_format_rows(pdf):
-            m = NEW_ROW_RE.match(row)
-            if not m:
-                continue
+    # Both layouts read the same page texts; extract them once.
+    texts = list(page_texts(file_bytes))
 
-            nome = _clean_spaces(m.group("nome")).replace("*", "").strip()
-            course_blob = _clean_spaces(m.group("curso_blob"))
+    # Try new format first.
+    # Rows come back already matched; no need to run NEW_ROW_RE again.
+    for m in _iter_new_format_rows(texts):
+        nome = clean_spaces(m.group("nome")).replace("*", "").strip()
+        course_blob = clean_spaces(m.group("curso_blob"))
 
-            # Filter: only USP entries for São Carlos.
-            if not _is_usp_institution(course_blob):
-                continue
-            if not _is_sao_carlos_campus(course_blob):
-                continue
+        # Filter: only USP entries for São Carlos.
+        if not _is_usp_institution(course_blob):
+            continue
+        if not _is_sao_carlos_campus(course_blob):
+            continue
 
-            curso, tipo, periodo = _split_course_blob(course_blob)
-            if not (nome and curso):
-                continue
-            records.append(Record(nome=nome, curso=curso, tipo=tipo, periodo=periodo))
-
-        # Backwards compatible parsing: old "Lista de Espera" layout.
-        if not records:
-            current_name: str | None = None
-            current_course: tuple[str, str, str] | None = None
-
-            for page in pdf.pages:
-                text = page.extract_text() or ""
-                for raw_line in text.splitlines():
-                    line = _clean_spaces(raw_line)
-                    if not line:
-                        continue
-
-                    if POSITION_RE.match(line):
-                        continue
-                    if line.startswith("Provão Paulista"):
-                        continue
-                    if "Lista de Espera" in line:
-                        continue
-                    if line.startswith("Processamento"):
-                        continue
-
-                    name_match = NAME_LINE_RE.match(line)
-                    if name_match:
-                        current_name = _clean_spaces(name_match.group("nome"))
-                        continue
-
-                    course_match = COURSE_LINE_RE.match(line)
-                    if course_match:
+        curso, tipo, periodo = _split_course_blob(course_blob)
+        if not (nome and curso):
+            continue
+        records.append(Record(nome=nome, curso=curso, tipo=tipo, periodo=periodo))
+
+    # Backwards compatible parsing: old "Lista de Espera" layout.
+    if not records:
+        current_name: str | None = None
+        current_course: tuple[str, str, str] | None = None
+
+        for text in texts:
+            for raw_line in text.splitlines():
+                line = clean_spaces(raw_line)
+                if not line:
+                    continue
+
+                if OLD_SKIP_RE.search(line):
+                    continue
+
+                # Position, name and course lines all start with a digit;
+                # other lines skip the regex engine.
+                m = OLD_LINE_RE.match(line) if line[0].isdigit() else None
+                if m:
+                    if m.group("nome") is not None:
+                        current_name = clean_spaces(m.group("nome"))
+                    elif m.group("curso") is not None:
                         current_course = (
-                            _clean_spaces(course_match.group("curso")),
-                            _clean_spaces(course_match.group("tipo")),
-                            _clean_spaces(course_match.group("periodo")),
+                            clean_spaces(m.group("curso")),
+                            clean_spaces(m.group("tipo")),
+                            clean_spaces(m.group("periodo")),
                         )
-                        continue
-
-                    if line.lower().startswith("campus"):
-                        if current_name and current_course and _is_sao_carlos_campus(line):
-                            curso, tipo, periodo = current_course
-                            records.append(
-                                Record(
-                                    nome=current_name,
-                                    curso=curso,
-                                    tipo=tipo,
-                                    periodo=periodo,
-                                )
+                    continue
+
+                if line.lower().startswith("campus"):
+                    if current_name and current_course and _is_sao_carlos_campus(line):
+                        curso, tipo, periodo = current_course
+                        records.append(
+                            Record(
+                                nome=current_name,
+                                curso=curso,
+                                tipo=tipo,
+                                periodo=periodo,
                             )
-                        current_name = None
-                        current_course = None
-                        continue
-
-    deduped: list[Record] = []
-    seen: set[tuple[str, str]] = set()
-    for r in records:
-        key = (r.nome, r.curso)
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(r)
+                        )
+                    current_name = None
+                    current_course = None
+                    continue
+
+    return to_columns(records, dedup=True)
 
-    return [asdict(r) for r in deduped]
+
+def extract_records_from_bytes(file_bytes: PdfSource) -> List[dict]:
+    return to_dicts(extract_columns_from_bytes(file_bytes))
 
 if __name__ == "__main__":
     import sys
     from pprint import pprint
 
+    if len(sys.argv) != 2:
+        print("Usage: python -m parsers.provao <provao-pdf-file>", file=sys.stderr)
+        sys.exit(1)
+
     with open(sys.argv[1], "rb") as f:
         data = f.read()
     records = extract_records_from_bytes(data)
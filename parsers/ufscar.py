@@ -8,38 +8,36 @@ Instead, we use campus only for filtering: we ingest only rows for
 """
 
 import re
-from dataclasses import dataclass, asdict
+import sys
 from typing import Optional, List
-import pdfplumber
-import io
 
-COURSE_LINE_RE = re.compile(
-    r"^.+\s-\s(?:Bacharelado|Licenciatura|Tecn[oó]logo|Engenharia|Medicina|Administra[cç][aã]o|\w+)\s-\s.+$",
-    re.IGNORECASE,
-)
-
-ROW_RE = re.compile(
-    r"^\s*\d{2}\*{2,}\d+\s+"  # masked ENEM inscription
-    r"(?P<nome>.+?)\s+"  # name
+from ._pdfio import PdfSource
+from ._pdftext import clean_spaces, page_texts
+from ._records import RecordColumns, empty_columns, to_dicts
+
+# One match per line tells the line kinds apart, in the order they used to be
+# tried:
+#   skip:   footer ("Emitido em:", "Página 1 de 9") and header lines
+#   course: "<curso> - <tipo> - <periodo>[ - <campus>]" header of a section
+#   row:    "<insc. enem mascarada> <nome> <grupo> <nota>"
+# Only the skip and course alternatives are case-insensitive; a course-like
+# line containing "Nome do Candidato" falls through to the row alternative.
+# The row's name is greedy: it backtracks from the end of the line over just
+# the group and score tokens, instead of retrying the tail after every word
+# of the name. Only one split fits, so both give the same groups.
+LINE_RE = re.compile(
+    r"(?P<skip>(?i:Emitido em:|P[áa]gina\s+\d+\s+de\s+\d+"
+    r"|Convoca[cç][aã]o|Processo Seletivo|UFSCar|\d+ª\s+Chamada"
+    r"|Insc\.\s+Enem\s+Nome\s+do\s+Candidato))"
+    r"|(?P<course>(?!.*Nome do Candidato)"
+    r"(?i:.+\s-\s(?:Bacharelado|Licenciatura|Tecn[oó]logo|Engenharia|Medicina|Administra[cç][aã]o|\w+)\s-\s.+)$)"
+    r"|(?P<row>\s*\d{2}\*{2,}\d+\s+"  # masked ENEM inscription
+    r"(?P<nome>.+)\s+"  # name
     r"(?P<grupo>[A-Z]{1,3}(?:_[A-Z]{2,5})*)\s+"  # group
-    r"(?P<nota>\d{1,3}(?:[\.,]\d{2})?)\s*$",  # score
-)
-
-FOOTER_RE = re.compile(r"^Emitido em:|^P[áa]gina\s+\d+\s+de\s+\d+", re.IGNORECASE)
-HEADER_SKIP_RE = re.compile(
-    r"^(Convoca[cç][aã]o|Processo Seletivo|UFSCar|\d+ª\s+Chamada|Insc\.\s+Enem\s+Nome\s+do\s+Candidato)",
-    re.IGNORECASE,
+    r"(?P<nota>\d{1,3}(?:[\.,]\d{2})?)\s*$)"  # score
 )
 
 
-@dataclass(frozen=True)
-class Record:
-    nome: str
-    curso: str
-    tipo: str
-    periodo: str
-
-
 def split_course_section(course_section: str) -> tuple[str, str, str, str]:
     """Split course header line into (curso, tipo, periodo, campus).
 
@@ -47,7 +45,7 @@ def split_course_section(course_section: str) -> tuple[str, str, str, str]:
     filter to São Carlos.
     """
 
-    parts = [_clean_spaces(p) for p in course_section.split(" - ")]
+    parts = [clean_spaces(p) for p in course_section.split(" - ")]
     if len(parts) >= 4:
         curso = parts[0]
         tipo = parts[1]
@@ -61,57 +59,72 @@ def split_course_section(course_section: str) -> tuple[str, str, str, str]:
         periodo = parts[2]
         return curso, tipo, periodo, ""
 
-    return _clean_spaces(course_section), "", "", ""
+    return clean_spaces(course_section), "", "", ""
 
 
 def _is_sao_carlos_campus(campus: str) -> bool:
     # Be tolerant to capitalization/accents and allow strings like:
     # - "Campus São Carlos"
     # - "CAMPUS SAO CARLOS"
-    c = _clean_spaces(campus).lower()
+    c = clean_spaces(campus).lower()
     return "são carlos" in c or "sao carlos" in c
 
 
-def _clean_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s.replace("\u00a0", " ")).strip()
-
-
-def extract_records_from_bytes(file_bytes: bytes) -> List[dict]:
-    records: list[Record] = []
-    current_course: Optional[str] = None
-
-    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for raw_line in text.splitlines():
-                line = _clean_spaces(raw_line)
-                if not line:
+def extract_columns_from_bytes(file_bytes: PdfSource) -> RecordColumns:
+    # Accepted rows go straight into the output columns; no per-row object is
+    # built in between.
+    nomes, cursos, tipos, periodos = columns = empty_columns()
+    # (nome, curso) keys already kept: the first record per key wins, so
+    # duplicates are dropped as they're read instead of in a second pass.
+    seen: set[tuple[str, str]] = set()
+    # (curso, tipo, periodo) of the section being read; None before the first
+    # course header and for sections outside São Carlos, whose rows are
+    # dropped.
+    current_course: Optional[tuple[str, str, str]] = None
+
+    for text in page_texts(file_bytes):
+        for raw_line in text.splitlines():
+            line = clean_spaces(raw_line)
+            if not line:
+                continue
+
+            # Course lines contain " - " and rows start with a digit; every
+            # other line (legend text, page furniture) is skipped either way,
+            # so it doesn't need the regex engine.
+            if not (line[0].isdigit() or " - " in line):
+                continue
+
+            m = LINE_RE.match(line)
+            if m is None:
+                continue
+            kind = m.lastgroup
+
+            if kind == "course":
+                # Split once per section rather than once per candidate row.
+                curso, tipo, periodo, campus = split_course_section(line)
+                if campus and not _is_sao_carlos_campus(campus):
+                    current_course = None
+                else:
+                    # Headers repeat on every page of a course: interning makes
+                    # all of its rows share one string per field, which also
+                    # pickles once (as a memo reference) back from the parse pool.
+                    current_course = (sys.intern(curso), sys.intern(tipo), sys.intern(periodo))
+                continue
+
+            if kind == "row" and current_course:
+                nome = clean_spaces(m.group("nome"))
+                curso, tipo, periodo = current_course
+                key = (nome, curso)
+                if key in seen:
                     continue
+                seen.add(key)
+                nomes.append(nome)
+                cursos.append(curso)
+                tipos.append(tipo)
+                periodos.append(periodo)
 
-                if FOOTER_RE.search(line):
-                    continue
-                if HEADER_SKIP_RE.search(line):
-                    continue
+    return columns
 
-                if COURSE_LINE_RE.match(line) and "Nome do Candidato" not in line:
-                    current_course = line
-                    continue
 
-                m = ROW_RE.match(line)
-                if m and current_course:
-                    nome = _clean_spaces(m.group("nome"))
-                    curso, tipo, periodo, campus = split_course_section(current_course)
-                    if campus and not _is_sao_carlos_campus(campus):
-                        continue
-                    records.append(Record(nome=nome, curso=curso, tipo=tipo, periodo=periodo))
-
-    seen = set()
-    deduped = []
-    for r in records:
-        key = (r.nome, r.curso)
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(asdict(r))
-
-    return deduped
+def extract_records_from_bytes(file_bytes: PdfSource) -> List[dict]:
+    return to_dicts(extract_columns_from_bytes(file_bytes))
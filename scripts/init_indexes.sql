@@ -0,0 +1,41 @@
+-- One-shot index setup for the ingest pipeline.
+--
+-- Applied at startup by main.apply_init_indexes() (worker.py waits for all of
+-- it before the first job; the API waits for the required statements and
+-- builds the rest in the background), or by hand with
+-- `psql "$DATABASE_URL" -f scripts/init_indexes.sql`, not from the request
+-- path. apply_init_indexes() first drops INVALID leftovers of failed builds
+-- so IF NOT EXISTS doesn't skip them. When applying by hand, check
+-- pg_index.indisvalid yourself. CONCURRENTLY avoids blocking readers while the
+-- index builds, but it cannot run inside a transaction block, so execute this
+-- file in autocommit mode (psql's default).
+--
+-- Each statement starts on a "-- statement" line: apply_init_indexes() runs
+-- the text between two of those lines as one statement, so statements are
+-- free to contain semicolons (string literals, DO blocks). Jobs fail without
+-- the statements marked "-- statement: required", so keep those cheap.
+
+-- statement: required
+-- Required by the `ON CONFLICT (nome)` upsert into dimension_lead.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS dimension_lead_nome_uq
+  ON public.dimension_lead (nome);
+
+-- statement
+-- Lets the per-job MERGE read the latest raw row of each just-inserted name
+-- straight off the index, without scanning leads_raw (its unique key leads
+-- with "Faculdade") or sorting the names' history.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS leads_raw_nome_created_idx
+  ON public.leads_raw ("Nome", created_at DESC);
+
+-- statement
+-- Backs the NOT EXISTS check when seeding fact_crm for new leads.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS fact_crm_lead_id_idx
+  ON public.fact_crm (lead_id);
+
+-- statement
+-- Lets _claim_pending_jobs find queued imports (in id order, up to its LIMIT)
+-- without scanning the ever-growing set of completed ones. The predicate must
+-- cover every status the claim can ask for, including stale 'parsing' jobs.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS imports_claim_idx
+  ON public.imports (id)
+  WHERE status IN ('queued_parse', 'pending', 'failed', 'parsing');
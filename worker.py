@@ -0,0 +1,54 @@
+"""Standalone job worker.
+
+Runs the same pipeline as `POST /process-jobs`, but in its own long-lived
+process, so PDF parsing never shares the API server's event loop and an API
+restart doesn't cut in-flight jobs short.
+
+There is no separate broker: the `imports` table already is the durable
+queue (every job's state lives in `imports.status`), so the worker simply
+polls it.
+
+Usage:
+    python worker.py
+
+Env:
+- DATABASE_URL, SUPABASE_STORAGE_BASE_URL: same as the API.
+- WORKER_POLL_INTERVAL: seconds to sleep between polls (default 30).
+"""
+
+import asyncio
+import os
+
+from main import (
+    apply_init_indexes,
+    check_environment,
+    close_db_pool,
+    close_parse_pool,
+    process_pending_jobs_task,
+    start_parse_pool,
+)
+
+POLL_INTERVAL_S = float(os.environ.get("WORKER_POLL_INTERVAL", "30"))
+
+
+async def run_forever() -> None:
+    check_environment()
+    # Jobs need the indexes (ON CONFLICT (nome) relies on one), so the worker
+    # waits for any builds before claiming work.
+    print("Waiting for index builds before processing jobs...")
+    apply_init_indexes()
+    start_parse_pool()
+    try:
+        # Retry previously failed jobs once at startup; afterwards only pick up
+        # new work so a permanently broken PDF isn't re-downloaded every poll.
+        await process_pending_jobs_task(include_failed=True)
+        while True:
+            await asyncio.sleep(POLL_INTERVAL_S)
+            await process_pending_jobs_task(include_failed=False)
+    finally:
+        close_parse_pool()
+        close_db_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_forever())